@@ -3,10 +3,17 @@
 
 Creates timeline.json with activity segments (paths) and place visits.
 Supports an overrides file for correcting inaccuracies.
+
+The input is stream-parsed with ijson when it is installed (pip install
+ijson), which keeps memory flat for multi-year exports; otherwise the whole
+file is loaded in one go (with orjson if installed, else the json module).
 """
 
 import argparse
+import bisect
+from collections import Counter, namedtuple
 from datetime import datetime
+import functools
 import json
 import re
 import sys
@@ -14,11 +21,24 @@ from pathlib import Path
 
 import yaml
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # Trip date range filter (Jan 27 - Feb 19, 2026)
 TRIP_START = datetime(2026, 1, 27, 0, 0, 0)
 TRIP_END = datetime(2026, 2, 19, 23, 59, 59)
 
+# Read/write buffer for the (potentially multi-GB) input and output files
+IO_BUFFER_SIZE = 1 << 20
+
 # Map Google activity types to our normalized types
 ACTIVITY_TYPE_MAP = {
     'walking': 'WALKING',
@@ -38,7 +58,34 @@ ACTIVITY_TYPE_MAP = {
     'motorcycling': 'DRIVING',
 }
 
-
+# 'geo:lat,lng' location strings; any further comma-separated fields are ignored
+_GEO_RE = re.compile(r'geo:([^,]+),([^,]+)')
+
+# Shared read-only default for missing nested objects (never mutate)
+_EMPTY = {}
+
+# strptime fallbacks for timestamps datetime.fromisoformat rejects
+_TS_FORMATS = (
+    '%Y-%m-%dT%H:%M:%S.%f%z',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y-%m-%dT%H:%M:%SZ',
+)
+
+# Override rules precompiled by compile_overrides for per-entry lookups
+CompiledOverrides = namedtuple('CompiledOverrides', [
+    'exclude_ids',                # frozenset of start-time prefixes to drop
+    'exclude_id_lengths',         # sorted distinct lengths of exclude_ids
+    'exclude_range_starts',       # sorted naive range starts
+    'exclude_range_max_ends',     # running max of naive range ends
+    'modify_prefix_to_activity',  # start prefix -> (rule index, activity)
+    'modify_prefix_exclude',      # frozenset of start prefixes to drop
+    'modify_prefix_lengths',      # sorted distinct modify prefix lengths
+    'add_segments',               # manually added segments, as loaded
+])
+
+
+@functools.lru_cache(maxsize=4096)
 def parse_geo_string(geo_str):
     """Parse 'geo:lat,lng' string to (lat, lng) tuple.
 
@@ -48,15 +95,16 @@ def parse_geo_string(geo_str):
     Returns:
         Tuple of (lat, lng) floats, or None if parsing fails.
     """
-    if not geo_str or not geo_str.startswith('geo:'):
+    m = _GEO_RE.match(geo_str) if geo_str else None
+    if not m:
         return None
     try:
-        coords = geo_str[4:].split(',')
-        return (float(coords[0]), float(coords[1]))
-    except (ValueError, IndexError):
+        return (float(m.group(1)), float(m.group(2)))
+    except ValueError:
         return None
 
 
+@functools.lru_cache(maxsize=4096)
 def parse_timestamp(ts_str):
     """Parse ISO timestamp string to datetime.
 
@@ -68,25 +116,24 @@ def parse_timestamp(ts_str):
     """
     if not ts_str:
         return None
+    # Fast path: Location History emits ISO 8601 already. Python < 3.11
+    # does not accept a trailing 'Z', so spell it out as an offset.
     try:
-        # Handle various ISO formats
-        # Remove colon in timezone offset for Python < 3.11 compatibility
-        ts_str = re.sub(r'([+-]\d{2}):(\d{2})$', r'\1\2', ts_str)
-        for fmt in [
-            '%Y-%m-%dT%H:%M:%S.%f%z',
-            '%Y-%m-%dT%H:%M:%S%z',
-            '%Y-%m-%dT%H:%M:%S.%fZ',
-            '%Y-%m-%dT%H:%M:%SZ',
-        ]:
-            try:
-                return datetime.strptime(ts_str, fmt)
-            except ValueError:
-                continue
-        return None
-    except Exception:
+        iso_str = ts_str[:-1] + '+00:00' if ts_str.endswith('Z') else ts_str
+        return datetime.fromisoformat(iso_str)
+    except (AttributeError, TypeError):
         return None
+    except ValueError:
+        pass
+    for fmt in _TS_FORMATS:
+        try:
+            return datetime.strptime(ts_str, fmt)
+        except ValueError:
+            continue
+    return None
 
 
+@functools.lru_cache(maxsize=128)
 def normalize_activity_type(activity_type):
     """Normalize Google activity type to our standard types.
 
@@ -130,24 +177,80 @@ def load_overrides(overrides_path):
         overrides_path: Path to overrides YAML file.
 
     Returns:
-        Dict with override rules.
+        CompiledOverrides built from the file's rules.
     """
     if not overrides_path.exists():
-        return {'exclude': [], 'modify': [], 'add_segments': []}
+        return compile_overrides({})
 
     try:
         with open(overrides_path, 'r') as f:
             data = yaml.safe_load(f)
         if not isinstance(data, dict):
-            return {'exclude': [], 'modify': [], 'add_segments': []}
-        return {
-            'exclude': data.get('exclude', []),
-            'modify': data.get('modify', []),
-            'add_segments': data.get('add_segments', []),
-        }
+            return compile_overrides({})
+        return compile_overrides(data)
     except Exception as e:
         print(f"Warning: Could not load overrides: {e}", file=sys.stderr)
-        return {'exclude': [], 'modify': [], 'add_segments': []}
+        return compile_overrides({})
+
+
+def compile_overrides(raw):
+    """Precompile raw override rules into lookup structures.
+
+    All rule timestamps are parsed here, once, so the per-entry checks in
+    should_exclude and apply_modifications reduce to set/dict lookups on
+    start-time prefixes and a bisect over the sorted exclude ranges.
+
+    Args:
+        raw: Dict loaded from the overrides YAML file.
+
+    Returns:
+        CompiledOverrides namedtuple.
+    """
+    exclude_ids = set()
+    exclude_ranges = []
+    for rule in raw.get('exclude') or []:
+        if 'id' in rule:
+            exclude_ids.add(rule['id'])
+        if 'start' in rule and 'end' in rule:
+            range_start = parse_timestamp(rule['start'])
+            range_end = parse_timestamp(rule['end'])
+            if range_start and range_end:
+                exclude_ranges.append((range_start.replace(tzinfo=None),
+                                       range_end.replace(tzinfo=None)))
+    exclude_ranges.sort()
+
+    # Running max of range ends: an entry at time t falls in some range iff
+    # the ranges starting at or before t reach at least t.
+    exclude_range_max_ends = []
+    for _, range_end in exclude_ranges:
+        if exclude_range_max_ends and exclude_range_max_ends[-1] > range_end:
+            range_end = exclude_range_max_ends[-1]
+        exclude_range_max_ends.append(range_end)
+
+    # Later rules override earlier ones, so remember each activity's rule index
+    modify_prefix_to_activity = {}
+    modify_prefix_exclude = set()
+    for index, rule in enumerate(raw.get('modify') or []):
+        match = rule.get('match') or {}
+        if 'start' not in match:
+            continue
+        set_rules = rule.get('set') or {}
+        if 'activity' in set_rules:
+            modify_prefix_to_activity[match['start']] = (index, set_rules['activity'])
+        if set_rules.get('exclude'):
+            modify_prefix_exclude.add(match['start'])
+
+    return CompiledOverrides(
+        exclude_ids=frozenset(exclude_ids),
+        exclude_id_lengths=tuple(sorted({len(i) for i in exclude_ids})),
+        exclude_range_starts=[start for start, _ in exclude_ranges],
+        exclude_range_max_ends=exclude_range_max_ends,
+        modify_prefix_to_activity=modify_prefix_to_activity,
+        modify_prefix_exclude=frozenset(modify_prefix_exclude),
+        modify_prefix_lengths=tuple(sorted(
+            {len(p) for p in modify_prefix_to_activity} | {len(p) for p in modify_prefix_exclude})),
+        add_segments=raw.get('add_segments') or [],
+    )
 
 
 def should_exclude(entry, start_dt, overrides):
@@ -156,30 +259,27 @@ def should_exclude(entry, start_dt, overrides):
     Args:
         entry: The raw entry from location history.
         start_dt: Parsed start datetime.
-        overrides: Loaded overrides dict.
+        overrides: CompiledOverrides from load_overrides.
 
     Returns:
         True if entry should be excluded.
     """
     start_str = entry.get('startTime', '')
 
-    exclude_rules = overrides.get('exclude') or []
-    for rule in exclude_rules:
-        # Match by exact start time
-        if 'id' in rule and start_str.startswith(rule['id']):
+    # Match by exact start time (prefix)
+    for length in overrides.exclude_id_lengths:
+        if len(start_str) < length:
+            break
+        if start_str[:length] in overrides.exclude_ids:
             return True
 
-        # Match by time range
-        if 'start' in rule and 'end' in rule:
-            range_start = parse_timestamp(rule['start'])
-            range_end = parse_timestamp(rule['end'])
-            if range_start and range_end and start_dt:
-                # Make timezone-naive for comparison
-                start_naive = start_dt.replace(tzinfo=None) if start_dt.tzinfo else start_dt
-                range_start_naive = range_start.replace(tzinfo=None) if range_start.tzinfo else range_start
-                range_end_naive = range_end.replace(tzinfo=None) if range_end.tzinfo else range_end
-                if range_start_naive <= start_naive <= range_end_naive:
-                    return True
+    # Match by time range
+    if start_dt and overrides.exclude_range_starts:
+        # Make timezone-naive for comparison
+        start_naive = start_dt.replace(tzinfo=None) if start_dt.tzinfo else start_dt
+        i = bisect.bisect_right(overrides.exclude_range_starts, start_naive)
+        if i and overrides.exclude_range_max_ends[i - 1] >= start_naive:
+            return True
 
     return False
 
@@ -191,54 +291,92 @@ def apply_modifications(entry, activity_type, start_dt, overrides):
         entry: The raw entry.
         activity_type: Current activity type.
         start_dt: Parsed start datetime.
-        overrides: Loaded overrides dict.
+        overrides: CompiledOverrides from load_overrides.
 
     Returns:
-        Modified activity type (or original if no match).
+        Modified activity type (or original if no match), or None if a
+        matching rule excludes the entry.
     """
     start_str = entry.get('startTime', '')
 
-    modify_rules = overrides.get('modify') or []
-    for rule in modify_rules:
-        match = rule.get('match', {})
-
-        # Match by start time prefix
-        if 'start' in match and start_str.startswith(match['start']):
-            set_rules = rule.get('set', {})
-            if 'activity' in set_rules:
-                activity_type = set_rules['activity']
-            if set_rules.get('exclude'):
-                return None  # Signal to exclude
+    # Match by start time prefix
+    best_index = -1
+    for length in overrides.modify_prefix_lengths:
+        if len(start_str) < length:
+            break
+        prefix = start_str[:length]
+        if prefix in overrides.modify_prefix_exclude:
+            return None  # Signal to exclude
+        match = overrides.modify_prefix_to_activity.get(prefix)
+        if match and match[0] > best_index:
+            best_index, activity_type = match
 
     return activity_type
 
 
-def parse_location_history(input_path, overrides):
-    """Parse Google Location History JSON file.
+def iter_location_history(input_path):
+    """Yield entries from a Google Location History JSON array.
 
     Args:
         input_path: Path to location-history.json.
-        overrides: Loaded overrides dict.
 
-    Returns:
-        Tuple of (segments_list, places_list).
+    Yields:
+        Entry dicts, one at a time when ijson is available.
     """
-    with open(input_path, 'r') as f:
-        data = json.load(f)
+    with open(input_path, 'rb', buffering=IO_BUFFER_SIZE) as f:
+        if ijson is not None:
+            # items() would silently yield nothing for a non-array document,
+            # so check the first parser event, then rewind and stream
+            first_event = next(ijson.parse(f), None)
+            if first_event is None or first_event[1] != 'start_array':
+                print("Error: Expected JSON array", file=sys.stderr)
+                return
+            f.seek(0)
+            yield from ijson.items(f, 'item', use_float=True)
+            return
+        data = orjson.loads(f.read()) if orjson is not None else json.load(f)
 
     if not isinstance(data, list):
         print("Error: Expected JSON array", file=sys.stderr)
-        return [], []
+        return
+    yield from data
 
+
+def parse_location_history(input_path, overrides):
+    """Parse Google Location History JSON file.
+
+    Args:
+        input_path: Path to location-history.json.
+        overrides: CompiledOverrides from load_overrides.
+
+    Returns:
+        Tuple of (segments_list, places_list).
+    """
     segments = []
     places = []
 
-    for entry in data:
+    # Local aliases for the hot loop
+    _parse_timestamp = parse_timestamp
+    _parse_geo_string = parse_geo_string
+    _normalize_activity_type = normalize_activity_type
+    segments_append = segments.append
+    places_append = places.append
+
+    # ISO 8601 strings sort lexicographically, so the wall-clock part of
+    # startTime can be range-checked before paying for a parse
+    trip_start_iso = TRIP_START.isoformat()
+    trip_end_iso = TRIP_END.isoformat()
+
+    for entry in iter_location_history(input_path):
         start_str = entry.get('startTime', '')
         end_str = entry.get('endTime', '')
 
-        start_dt = parse_timestamp(start_str)
-        end_dt = parse_timestamp(end_str)
+        if start_str[10:11] == 'T':
+            wall_clock = start_str[:19]
+            if wall_clock < trip_start_iso or wall_clock > trip_end_iso:
+                continue
+
+        start_dt = _parse_timestamp(start_str)
 
         # Filter to trip date range
         if start_dt:
@@ -251,19 +389,18 @@ def parse_location_history(input_path, overrides):
             continue
 
         # Process activity (travel) entries
-        if 'activity' in entry:
-            activity = entry['activity']
-
-            raw_type = activity.get('topCandidate', {}).get('type', '')
-            activity_type = normalize_activity_type(raw_type)
+        activity = entry.get('activity')
+        if activity is not None:
+            raw_type = (activity.get('topCandidate') or _EMPTY).get('type', '')
+            activity_type = _normalize_activity_type(raw_type)
 
             # Apply modifications
             activity_type = apply_modifications(entry, activity_type, start_dt, overrides)
             if activity_type is None:
                 continue  # Excluded by modification rule
 
-            start_coords = parse_geo_string(activity.get('start'))
-            end_coords = parse_geo_string(activity.get('end'))
+            start_coords = _parse_geo_string(activity.get('start'))
+            end_coords = _parse_geo_string(activity.get('end'))
 
             if start_coords and end_coords:
                 segment = {
@@ -278,14 +415,16 @@ def parse_location_history(input_path, overrides):
                     'probability': activity.get('probability'),
                     'raw_type': raw_type,  # Keep for debugging/editing
                 }
-                segments.append(segment)
+                segments_append(segment)
+
+            continue
 
         # Process visit (place) entries
-        elif 'visit' in entry:
-            visit = entry['visit']
-            top_candidate = visit.get('topCandidate', {})
+        visit = entry.get('visit')
+        if visit is not None:
+            top_candidate = visit.get('topCandidate') or _EMPTY
 
-            coords = parse_geo_string(top_candidate.get('placeLocation'))
+            coords = _parse_geo_string(top_candidate.get('placeLocation'))
             if coords:
                 place = {
                     'lat': coords[0],
@@ -296,11 +435,10 @@ def parse_location_history(input_path, overrides):
                     'placeId': top_candidate.get('placeID', ''),
                     'probability': visit.get('probability'),
                 }
-                places.append(place)
+                places_append(place)
 
     # Add manual segments from overrides
-    add_segments = overrides.get('add_segments') or []
-    for seg in add_segments:
+    for seg in overrides.add_segments:
         segments.append({
             'activity': seg.get('activity', 'UNKNOWN'),
             'start': seg.get('start', ''),
@@ -316,6 +454,67 @@ def parse_location_history(input_path, overrides):
     return segments, places
 
 
+def write_json(path, data, pretty=False):
+    """Write data to a JSON file, compact unless pretty is set.
+
+    Uses orjson when available, otherwise the standard json module.
+
+    Args:
+        path: Output file path.
+        data: JSON-serializable object.
+        pretty: If True, indent with 2 spaces for human reading.
+    """
+    if orjson is not None:
+        with open(path, 'wb', buffering=IO_BUFFER_SIZE) as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        with open(path, 'w', buffering=IO_BUFFER_SIZE) as f:
+            if pretty:
+                json.dump(data, f, indent=2)
+            else:
+                json.dump(data, f, separators=(',', ':'))
+
+
+def write_timeline(path, timeline_data, pretty=False):
+    """Write a timeline dict to JSON one record at a time.
+
+    Each segment/place is encoded and written separately, so the encoded
+    document never exists in memory as a whole. The bytes match what
+    write_json produces for the same data.
+
+    Args:
+        path: Output file path.
+        timeline_data: Dict whose values are lists of records or scalars.
+        pretty: If True, indent with 2 spaces (delegates to write_json).
+    """
+    if pretty:
+        write_json(path, timeline_data, pretty=True)
+        return
+
+    if orjson is not None:
+        dumps = orjson.dumps
+    else:
+        def dumps(obj):
+            return json.dumps(obj, separators=(',', ':')).encode()
+
+    with open(path, 'wb', buffering=IO_BUFFER_SIZE) as f:
+        f.write(b'{')
+        for i, (key, value) in enumerate(timeline_data.items()):
+            if i:
+                f.write(b',')
+            f.write(dumps(key) + b':')
+            if isinstance(value, list):
+                f.write(b'[')
+                for j, record in enumerate(value):
+                    if j:
+                        f.write(b',')
+                    f.write(dumps(record))
+                f.write(b']')
+            else:
+                f.write(dumps(value))
+        f.write(b'}')
+
+
 def create_default_overrides(output_path):
     """Create a default overrides template file.
 
@@ -389,6 +588,10 @@ def main():
         '--dump-raw', action='store_true',
         help='Also output raw parsed data for debugging'
     )
+    parser.add_argument(
+        '--pretty', action='store_true',
+        help='Indent the output JSON for readability (default: compact)'
+    )
     args = parser.parse_args()
 
     # Handle date filtering
@@ -423,10 +626,7 @@ def main():
     print(f"Found {len(segments)} activity segments, {len(places)} place visits")
 
     # Activity type breakdown
-    type_counts = {}
-    for seg in segments:
-        t = seg.get('activity', 'UNKNOWN')
-        type_counts[t] = type_counts.get(t, 0) + 1
+    type_counts = Counter(seg.get('activity', 'UNKNOWN') for seg in segments)
     print("Activity breakdown:")
     for t, count in sorted(type_counts.items()):
         print(f"  {t}: {count}")
@@ -441,16 +641,14 @@ def main():
         'generated': datetime.now().isoformat(),
     }
 
-    with open(output_path, 'w') as f:
-        json.dump(timeline_data, f, indent=2)
+    write_timeline(output_path, timeline_data, pretty=args.pretty)
 
     print(f"Written to {output_path}")
 
     # Dump raw data if requested
     if args.dump_raw:
         raw_path = output_path.with_suffix('.raw.json')
-        with open(raw_path, 'w') as f:
-            json.dump({'segments': segments, 'places': places}, f, indent=2)
+        write_timeline(raw_path, {'segments': segments, 'places': places}, pretty=args.pretty)
         print(f"Raw data written to {raw_path}")
 
 
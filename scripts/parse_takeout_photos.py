@@ -2,15 +2,33 @@
 """Parse Google Takeout photo metadata to extract location timeline."""
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import functools
 import glob
 import json
+from operator import itemgetter
+import os
 from pathlib import Path
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # Trip date range filter (Jan 27 - Feb 19, 2026)
 TRIP_START = datetime(2026, 1, 27, 0, 0, 0)
 TRIP_END = datetime(2026, 2, 19, 23, 59, 59)
+# Same range as Unix timestamps, for filtering before any datetime is built
+TRIP_START_TS = int(TRIP_START.timestamp())
+TRIP_END_TS = int(TRIP_END.timestamp())
+
+METADATA_SUFFIX = '.supplemental-metadata.json'
+
+# Write buffer for the output file (the small metadata inputs keep the default)
+IO_BUFFER_SIZE = 1 << 20
 
 
 def parse_timestamp(timestamp_str):
@@ -28,19 +46,22 @@ def parse_timestamp(timestamp_str):
         return None
 
 
-def parse_metadata_file(filepath):
+def parse_metadata_file(filepath, ts_range=None):
     """Extract location and timestamp from a Google Photos supplemental metadata file.
 
     Args:
         filepath: Path to the .supplemental-metadata.json file.
+        ts_range: Optional inclusive (start, end) Unix timestamp range; photos
+            taken outside it are rejected before any datetime is built.
 
     Returns:
         Dict with lat, lng, timestamp, source or None if no valid data.
     """
     try:
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except (json.JSONDecodeError, FileNotFoundError):  # orjson's error subclasses it
         return None
 
     # Extract geo data
@@ -57,13 +78,22 @@ def parse_metadata_file(filepath):
     # Extract photo taken time
     photo_time = data.get('photoTakenTime', {})
     timestamp_str = photo_time.get('timestamp')
+    if ts_range is not None:
+        try:
+            ts = int(timestamp_str)
+        except (ValueError, TypeError):
+            return None
+        if ts < ts_range[0] or ts > ts_range[1]:
+            return None
     dt = parse_timestamp(timestamp_str)
 
     if dt is None:
         return None
 
     # Get source filename from title
-    source = data.get('title', Path(filepath).stem.replace('.supplemental-metadata', ''))
+    source = data.get('title')
+    if source is None:
+        source = os.path.basename(filepath).removesuffix(METADATA_SUFFIX)
 
     return {
         'lat': round(lat, 6),
@@ -73,6 +103,30 @@ def parse_metadata_file(filepath):
     }
 
 
+def _walk_metadata(root):
+    """Yield supplemental metadata file paths under a directory tree.
+
+    Uses an explicit os.scandir stack rather than a recursive glob. Like
+    glob, hidden files and directories are skipped.
+
+    Args:
+        root: Directory to walk.
+
+    Yields:
+        File path strings.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(METADATA_SUFFIX):
+                    yield entry.path
+
+
 def find_takeout_metadata(base_path):
     """Find all supplemental metadata files in Google Takeout directories.
 
@@ -82,17 +136,37 @@ def find_takeout_metadata(base_path):
     Returns:
         List of file paths.
     """
-    patterns = [
-        f'{base_path}/takeout-*/Takeout/Google Photos/**/*.supplemental-metadata.json',
-        f'{base_path}/Takeout/Google Photos/**/*.supplemental-metadata.json',
-    ]
+    roots = glob.glob(f'{base_path}/takeout-*/Takeout/Google Photos')
+    roots.append(f'{base_path}/Takeout/Google Photos')
 
     files = []
-    for pattern in patterns:
-        files.extend(glob.glob(pattern, recursive=True))
+    for root in roots:
+        if os.path.isdir(root):
+            files.extend(_walk_metadata(root))
     return files
 
 
+def write_json(path, data, pretty=False):
+    """Write data to a JSON file, compact unless pretty is set.
+
+    Uses orjson when available, otherwise the standard json module.
+
+    Args:
+        path: Output file path.
+        data: JSON-serializable object.
+        pretty: If True, indent with 2 spaces for human reading.
+    """
+    if orjson is not None:
+        with open(path, 'wb', buffering=IO_BUFFER_SIZE) as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        with open(path, 'w', buffering=IO_BUFFER_SIZE) as f:
+            if pretty:
+                json.dump(data, f, indent=2)
+            else:
+                json.dump(data, f, separators=(',', ':'))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Parse Google Takeout photo metadata for location timeline.'
@@ -109,37 +183,40 @@ def main():
         '--no-filter', action='store_true',
         help='Skip date range filtering'
     )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help='Number of parser processes (default: CPU count). Going above the '
+             'CPU count can help overlap disk reads on a cold cache.'
+    )
+    parser.add_argument(
+        '--pretty', action='store_true',
+        help='Indent the output JSON for readability (default: compact)'
+    )
     args = parser.parse_args()
 
+    if args.workers is not None and args.workers < 1:
+        print(f"Error: --workers must be at least 1 (got {args.workers}).", file=sys.stderr)
+        sys.exit(1)
+
     # Find metadata files
     files = find_takeout_metadata(args.takeout_dir)
     print(f"Found {len(files)} metadata files")
 
-    # Parse each file
-    points = []
-    for filepath in files:
-        point = parse_metadata_file(filepath)
-        if point is None:
-            continue
-
-        # Filter to trip date range
-        if not args.no_filter:
-            dt = datetime.fromisoformat(point['timestamp'])
-            if dt < TRIP_START or dt > TRIP_END:
+    # Parse files in parallel, filtering to the trip date range as we go.
+    # Dedup by source happens during collection, keeping the earliest point
+    # for each source, so only the survivors need sorting.
+    ts_range = None if args.no_filter else (TRIP_START_TS, TRIP_END_TS)
+    parse = functools.partial(parse_metadata_file, ts_range=ts_range)
+    by_source = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for point in executor.map(parse, files, chunksize=64):
+            if point is None:
                 continue
+            kept = by_source.get(point['source'])
+            if kept is None or point['timestamp'] < kept['timestamp']:
+                by_source[point['source']] = point
 
-        points.append(point)
-
-    # Sort by timestamp
-    points.sort(key=lambda p: p['timestamp'])
-
-    # Deduplicate by source (keep first occurrence)
-    seen = set()
-    unique_points = []
-    for p in points:
-        if p['source'] not in seen:
-            seen.add(p['source'])
-            unique_points.append(p)
+    unique_points = sorted(by_source.values(), key=itemgetter('timestamp'))
 
     print(f"Extracted {len(unique_points)} location points within trip date range")
 
@@ -154,8 +231,7 @@ def main():
         'trip_end': TRIP_END.isoformat()
     }
 
-    with open(output_path, 'w') as f:
-        json.dump(output_data, f, indent=2)
+    write_json(output_path, output_data, pretty=args.pretty)
 
     print(f"Written to {output_path}")
 
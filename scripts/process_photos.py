@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
-"""Process geotagged photos: extract EXIF GPS data, generate thumbnails, write manifest."""
+"""Process geotagged photos: extract EXIF GPS data, generate thumbnails, write manifest.
+
+Video metadata is read in-process with PyAV when it is installed (pip install
+av); otherwise each video is probed with ffprobe. JSON outputs are written
+with orjson when it is installed (pip install orjson), else the json module.
+"""
 
 import argparse
+import bisect
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import functools
 import json
 import math
 import os
@@ -13,8 +21,20 @@ import sys
 import urllib.parse
 from pathlib import Path
 
-from PIL import Image, ExifTags
+from PIL import Image, ExifTags, features
+from PIL.JpegImagePlugin import JpegImageFile
 from pillow_heif import register_heif_opener
+import yaml
+
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Register HEIC/HEIF support so Pillow can open .heic files
 register_heif_opener()
@@ -22,6 +42,9 @@ register_heif_opener()
 SUPPORTED_EXTENSIONS = {'.jpg', '.jpeg', '.tif', '.tiff', '.heic', '.heif'}
 VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm'}
 
+# Use the libyaml-backed loader when PyYAML was built with it
+YAML_SAFE_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 # Google Drive lh3 proxy base URL
 LH3_BASE = 'https://lh3.googleusercontent.com/d/'
 LH3_SUFFIX = '=w2400'
@@ -164,6 +187,18 @@ def extract_datetime(exif_data):
     if not date_str:
         date_str = exif_data.get(306, '')
     if date_str:
+        # Fast path for the fixed "YYYY:MM:DD HH:MM:SS" layout; anything
+        # else (or an out-of-range field) is left to strptime
+        if (len(date_str) == 19 and date_str[4] == ':' and date_str[7] == ':'
+                and date_str[10] == ' ' and date_str[13] == ':' and date_str[16] == ':'):
+            digits = (date_str[0:4] + date_str[5:7] + date_str[8:10]
+                      + date_str[11:13] + date_str[14:16] + date_str[17:19])
+            if digits.isascii() and digits.isdigit():
+                try:
+                    return datetime(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+                                    int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19]))
+                except ValueError:
+                    pass
         try:
             return datetime.strptime(date_str, '%Y:%m:%d %H:%M:%S')
         except (ValueError, AttributeError):
@@ -171,29 +206,52 @@ def extract_datetime(exif_data):
     return None
 
 
-def find_nearest_gps(dt, gps_references, max_gap_seconds=7200):
+def find_nearest_gps(dt, ref_times, ref_coords, max_gap_seconds=7200):
     """Find the nearest geotagged photo by timestamp.
 
+    Uses a binary search over the sorted reference times, so each lookup
+    only compares the neighbours on either side of ``dt``.
+
     Args:
         dt: datetime of the photo without GPS.
-        gps_references: List of (datetime, lat, lng) sorted by datetime.
+        ref_times: Sorted list of reference datetimes.
+        ref_coords: List of (lat, lng) parallel to ref_times.
         max_gap_seconds: Maximum time gap to allow interpolation (default 2h).
 
     Returns:
         Tuple of (lat, lng, gap_seconds) or None if no match within threshold.
     """
+    i = bisect.bisect_left(ref_times, dt)
     best = None
     best_gap = float('inf')
-    for ref_dt, lat, lng in gps_references:
-        gap = abs((ref_dt - dt).total_seconds())
+    if i > 0:
+        # Among equal timestamps, prefer the earliest reference
+        j = bisect.bisect_left(ref_times, ref_times[i - 1], 0, i)
+        best_gap = abs((ref_times[j] - dt).total_seconds())
+        best = (*ref_coords[j], best_gap)
+    if i < len(ref_times):
+        gap = abs((ref_times[i] - dt).total_seconds())
         if gap < best_gap:
             best_gap = gap
-            best = (lat, lng, gap)
+            best = (*ref_coords[i], gap)
     if best and best_gap <= max_gap_seconds:
         return best
     return None
 
 
+# EXIF orientation value -> transpose that displays the image upright
+# (same mapping as ImageOps.exif_transpose)
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
 def create_thumbnail(image, thumb_path, thumb_width):
     """Create a thumbnail with EXIF orientation applied.
 
@@ -202,40 +260,49 @@ def create_thumbnail(image, thumb_path, thumb_width):
         thumb_path: Output path for the thumbnail.
         thumb_width: Desired width in pixels.
     """
-    # Auto-rotate based on EXIF orientation
+    # Only JPEG needs the file left undecoded (for draft below); this
+    # includes multi-frame phone JPEGs, which Pillow opens as MPO. Other
+    # plugins may apply the orientation while decoding (TIFF does on newer
+    # Pillow) and drop the tag, so decode first and read what is left.
+    is_jpeg = isinstance(image, JpegImageFile)
+    if not is_jpeg:
+        image.load()
     try:
-        exif = image.getexif()
-        orientation = exif.get(274)  # Tag 274 = Orientation
-        if orientation:
-            rotate_map = {
-                3: 180,
-                6: 270,
-                8: 90,
-            }
-            if orientation in rotate_map:
-                image = image.rotate(rotate_map[orientation], expand=True)
-            elif orientation == 2:
-                image = image.transpose(Image.FLIP_LEFT_RIGHT)
-            elif orientation == 4:
-                image = image.transpose(Image.FLIP_TOP_BOTTOM)
-            elif orientation == 5:
-                image = image.transpose(Image.FLIP_LEFT_RIGHT).rotate(270, expand=True)
-            elif orientation == 7:
-                image = image.transpose(Image.FLIP_LEFT_RIGHT).rotate(90, expand=True)
+        orientation = image.getexif().get(274)  # Tag 274 = Orientation
     except (AttributeError, KeyError):
-        pass
+        orientation = None
 
-    # Resize preserving aspect ratio
+    # Size the output from the oriented source dimensions; rotations by
+    # 90 degrees (orientations 5-8) swap width and height
     w, h = image.size
+    if orientation in (5, 6, 7, 8):
+        w, h = h, w
     ratio = thumb_width / w
     thumb_height = int(h * ratio)
-    image = image.resize((thumb_width, thumb_height), Image.LANCZOS)
+
+    # Let libjpeg decode at a reduced scale (1/2, 1/4 or 1/8) when the
+    # source is much larger than the thumbnail. Keep at least twice the
+    # target size so the LANCZOS resize still has detail to work with.
+    if is_jpeg:
+        scale = 2 * ratio
+        image.draft(image.mode, (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+
+    # Resize first, then apply the EXIF orientation to the small image.
+    # Rotations by 90 degrees need the target size swapped before rotating.
+    if orientation in (5, 6, 7, 8):
+        image = image.resize((thumb_height, thumb_width), Image.LANCZOS)
+    else:
+        image = image.resize((thumb_width, thumb_height), Image.LANCZOS)
+    method = ORIENTATION_TRANSPOSE.get(orientation)
+    if method is not None:
+        image = image.transpose(method)
 
     # Convert to RGB if necessary (e.g., RGBA or palette mode)
     if image.mode not in ('RGB',):
         image = image.convert('RGB')
 
-    image.save(thumb_path, 'JPEG', quality=85)
+    # Plain baseline 4:2:0 JPEG: no extra Huffman optimization pass
+    image.save(thumb_path, 'JPEG', quality=85, optimize=False, progressive=False, subsampling=2)
 
 
 def is_video(filepath):
@@ -270,17 +337,31 @@ def parse_iso6709(location_str):
     return (lat, lng)
 
 
-def extract_video_gps(filepath):
-    """Extract GPS coordinates from video metadata using ffprobe.
+@functools.lru_cache(maxsize=None)
+def probe_video(filepath):
+    """Read container-level metadata from a video.
 
-    Looks for com.apple.quicktime.location.ISO6709 or location tags.
+    Uses PyAV when available, falling back to ffprobe if it is missing or
+    cannot open the file. Memoized per path, so the metadata extractors
+    and the thumbnail grab share a single probe per video.
 
     Args:
         filepath: Path to the video file.
 
     Returns:
-        Tuple of (lat, lng) or None.
+        Dict with 'tags' (format tags) and 'duration' (seconds, or None if
+        unknown), or None if the video cannot be probed.
     """
+    if av is not None:
+        try:
+            with av.open(str(filepath)) as container:
+                duration = container.duration
+                return {
+                    'tags': dict(container.metadata),
+                    'duration': duration / av.time_base if duration is not None else None,
+                }
+        except Exception:
+            pass
     try:
         result = subprocess.run(
             ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', str(filepath)],
@@ -289,7 +370,41 @@ def extract_video_gps(filepath):
         if result.returncode != 0:
             return None
         meta = json.loads(result.stdout)
-        tags = meta.get('format', {}).get('tags', {})
+        fmt = meta.get('format', {})
+        tags = fmt.get('tags', {})
+        duration = fmt.get('duration')
+    except Exception:
+        return None
+    if not isinstance(tags, dict):
+        return None
+    try:
+        duration = float(duration)
+    except (TypeError, ValueError):
+        duration = None
+    return {'tags': tags, 'duration': duration}
+
+
+def probe_video_tags(filepath):
+    """Return a video's format tags from probe_video, or None on failure."""
+    info = probe_video(filepath)
+    return info['tags'] if info is not None else None
+
+
+def extract_video_gps(filepath):
+    """Extract GPS coordinates from video metadata using ffprobe.
+
+    Looks for com.apple.quicktime.location.ISO6709 or location tags.
+
+    Args:
+        filepath: Path to the video file.
+
+    Returns:
+        Tuple of (lat, lng) or None.
+    """
+    tags = probe_video_tags(filepath)
+    if tags is None:
+        return None
+    try:
         # Try Apple QuickTime location tag first
         loc = tags.get('com.apple.quicktime.location.ISO6709', '')
         if loc:
@@ -312,15 +427,10 @@ def extract_video_date(filepath):
     Returns:
         Date string or empty string.
     """
+    tags = probe_video_tags(filepath)
+    if tags is None:
+        return ''
     try:
-        result = subprocess.run(
-            ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', str(filepath)],
-            capture_output=True, text=True, timeout=30
-        )
-        if result.returncode != 0:
-            return ''
-        meta = json.loads(result.stdout)
-        tags = meta.get('format', {}).get('tags', {})
         creation = tags.get('creation_time', '')
         if creation:
             # Typical format: 2026-01-29T19:14:19.000000Z
@@ -339,15 +449,10 @@ def extract_video_datetime(filepath):
     Returns:
         datetime object or None.
     """
+    tags = probe_video_tags(filepath)
+    if tags is None:
+        return None
     try:
-        result = subprocess.run(
-            ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', str(filepath)],
-            capture_output=True, text=True, timeout=30
-        )
-        if result.returncode != 0:
-            return None
-        meta = json.loads(result.stdout)
-        tags = meta.get('format', {}).get('tags', {})
         creation = tags.get('creation_time', '')
         if creation:
             # Try parsing ISO format
@@ -364,33 +469,34 @@ def extract_video_datetime(filepath):
 def create_video_thumbnail(filepath, thumb_path, thumb_width):
     """Extract a frame from a video to use as thumbnail.
 
-    Uses ffmpeg to grab a frame at 1 second into the video.
+    Uses ffmpeg to grab a frame at 1 second into the video, letting it
+    pick a hardware decoder when one is available. Only the first video
+    stream is decoded, and ffmpeg's console output is discarded. Clips
+    probed as a second or shorter go straight to the first frame.
 
     Args:
         filepath: Path to the video file.
         thumb_path: Output path for the thumbnail JPEG.
         thumb_width: Desired width in pixels.
     """
-    subprocess.run(
-        [
-            'ffmpeg', '-y', '-ss', '1', '-i', str(filepath),
-            '-vframes', '1',
-            '-vf', f'scale={thumb_width}:-1',
-            str(thumb_path)
-        ],
-        capture_output=True, timeout=60
-    )
-    if not Path(thumb_path).exists():
-        # Fallback: try frame at 0s for very short videos
+    info = probe_video(filepath)
+    duration = info['duration'] if info is not None else None
+    # Fallback to 0s for very short videos, unless the duration already
+    # says there is no frame at 1s
+    offsets = ('0',) if duration is not None and duration <= 1 else ('1', '0')
+    for offset in offsets:
         subprocess.run(
             [
-                'ffmpeg', '-y', '-ss', '0', '-i', str(filepath),
-                '-vframes', '1',
-                '-vf', f'scale={thumb_width}:-1',
+                'ffmpeg', '-y', '-loglevel', 'error',
+                '-hwaccel', 'auto', '-ss', offset, '-i', str(filepath),
+                '-map', '0:v:0', '-frames:v', '1', '-an', '-sn', '-dn',
+                '-vf', f'scale={thumb_width}:-1:flags=lanczos',
                 str(thumb_path)
             ],
-            capture_output=True, timeout=60
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60
         )
+        if Path(thumb_path).exists():
+            break
 
 
 FIREBASE_STORAGE_MARKER = "firebasestorage.googleapis.com"
@@ -511,9 +617,8 @@ def load_notes(data_dir):
         return {}, []
 
     try:
-        import yaml
         with open(notes_path, 'r') as f:
-            notes = yaml.safe_load(f)
+            notes = yaml.load(f, Loader=YAML_SAFE_LOADER)
         if not isinstance(notes, dict):
             return {}, []
 
@@ -534,6 +639,31 @@ def load_notes(data_dir):
         return {}, []
 
 
+def write_json(path, data, pretty=False):
+    """Atomically write data to a JSON file, compact unless pretty is set.
+
+    The data goes to a temporary file next to path that is then renamed
+    over it, so readers never see a partially written file. Uses orjson
+    when available, otherwise the standard json module.
+
+    Args:
+        path: Output file path.
+        data: JSON-serializable object.
+        pretty: If True, indent with 2 spaces for human reading.
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    if orjson is not None:
+        tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        # json.dump issues many small writes; a large buffer batches them
+        with open(tmp_path, 'w', buffering=1 << 20) as f:
+            if pretty:
+                json.dump(data, f, indent=2)
+            else:
+                json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
 def load_cache(cache_path):
     """Load the processing cache file.
 
@@ -541,13 +671,13 @@ def load_cache(cache_path):
         cache_path: Path to .process_cache.json.
 
     Returns:
-        Dict mapping filename to {mtime, size}.
+        Dict mapping filename to {mtime, size, ref_lat, ref_lng, ref_dt}.
     """
     if not cache_path.exists():
         return {}
     try:
-        with open(cache_path, 'r') as f:
-            return json.load(f)
+        with open(cache_path, 'rb') as f:
+            return orjson.loads(f.read()) if orjson is not None else json.load(f)
     except Exception:
         return {}
 
@@ -557,17 +687,71 @@ def save_cache(cache_path, cache):
 
     Args:
         cache_path: Path to .process_cache.json.
-        cache: Dict mapping filename to {mtime, size}.
+        cache: Dict mapping filename to {mtime, size, ref_lat, ref_lng, ref_dt}.
+    """
+    write_json(cache_path, cache, pretty=True)
+
+
+def gps_reference_fields(coords, dt):
+    """Build the cache fields that record a file's GPS reference.
+
+    Storing these lets a cache hit contribute to interpolation without
+    reopening the file.
+
+    Args:
+        coords: Tuple of (lat, lng) or None.
+        dt: datetime or None.
+
+    Returns:
+        Dict with 'ref_lat', 'ref_lng' and 'ref_dt' (ISO 8601), or just
+        'ref_dt': None when the file cannot serve as a reference.
     """
-    with open(cache_path, 'w') as f:
-        json.dump(cache, f, indent=2)
+    if coords and dt:
+        return {'ref_lat': coords[0], 'ref_lng': coords[1], 'ref_dt': dt.isoformat()}
+    return {'ref_dt': None}
+
 
+def build_manifest_entry(filepath, lat, lng, date, dt, caption, tags,
+                         google_photos_url, web_url, media_type):
+    """Build a manifest.json entry for a photo or video.
 
-def load_existing_manifest(output_path):
+    Args:
+        filepath: Path to the source media file.
+        lat: Latitude in decimal degrees.
+        lng: Longitude in decimal degrees.
+        date: Date string (YYYY-MM-DD) or empty string.
+        dt: datetime or None.
+        caption: Caption from notes.yaml.
+        tags: List of tags from notes.yaml.
+        google_photos_url: Google Photos/Drive URL from notes.yaml.
+        web_url: URL the site opens for the full-size media.
+        media_type: 'photo' or 'video'.
+
+    Returns:
+        Manifest entry dict.
+    """
+    return {
+        'lat': round(lat, 6),
+        'lng': round(lng, 6),
+        'url': 'photos/' + filepath.name,
+        'thumbnail': 'thumbs/' + filepath.stem + '.jpg',
+        'caption': caption,
+        'date': date,
+        'datetime': dt.isoformat() if dt else '',
+        'tags': tags,
+        'google_photos_url': google_photos_url,
+        'web_url': web_url,
+        'type': media_type,
+    }
+
+
+def load_existing_manifest(output_path, needed_urls=None):
     """Load existing manifest.json into a dict keyed by url.
 
     Args:
         output_path: Path to manifest.json.
+        needed_urls: Optional set of urls to keep; other entries are dropped
+            as they are read.
 
     Returns:
         Dict mapping photo url (e.g. 'photos/IMG_001.HEIC') to manifest entry.
@@ -575,9 +759,11 @@ def load_existing_manifest(output_path):
     if not output_path.exists():
         return {}
     try:
-        with open(output_path, 'r') as f:
-            entries = json.load(f)
-        return {e['url']: e for e in entries}
+        with open(output_path, 'rb') as f:
+            entries = orjson.loads(f.read()) if orjson is not None else json.load(f)
+        if needed_urls is None:
+            return {e['url']: e for e in entries}
+        return {e['url']: e for e in entries if e['url'] in needed_urls}
     except Exception:
         return {}
 
@@ -612,8 +798,153 @@ def merge_notes_into_entry(entry, notes, filename):
     return entry
 
 
+def thumbnail_is_current(filepath, thumb_path, thumb_width):
+    """Check whether an existing thumbnail can be reused.
+
+    A thumbnail is current if it is at least as new as its source and was
+    generated at the requested width (read from the JPEG header only).
+
+    Args:
+        filepath: Path to the source photo or video.
+        thumb_path: Path to the thumbnail JPEG.
+        thumb_width: Desired width in pixels.
+
+    Returns:
+        True if the thumbnail exists and is up to date.
+    """
+    try:
+        if thumb_path.stat().st_mtime < filepath.stat().st_mtime:
+            return False
+        with Image.open(thumb_path) as thumb:
+            return thumb.width == thumb_width
+    except Exception:
+        return False
+
+
+def create_deferred_thumbnail(filepath, image, thumb_path, thumb_width, force=False):
+    """Build the thumbnail for a file without GPS that pass 2 may interpolate.
+
+    Args:
+        filepath: Path to the photo or video.
+        image: The opened PIL Image, or None for a video.
+        thumb_path: Output path for the thumbnail JPEG.
+        thumb_width: Thumbnail width in pixels.
+        force: If True, regenerate even if the existing thumbnail is current.
+
+    Returns:
+        Tuple of (warning, created): the warning to print if the file is
+        interpolated after all (or None), and whether a thumbnail was written
+        where none existed before.
+    """
+    if not force and thumbnail_is_current(filepath, thumb_path, thumb_width):
+        return None, False
+    existed = thumb_path.exists()
+    try:
+        if image is None:
+            create_video_thumbnail(filepath, thumb_path, thumb_width)
+            if not thumb_path.exists():
+                return f"  Warning: video thumbnail generation failed for {filepath.name}", False
+        else:
+            create_thumbnail(image, thumb_path, thumb_width)
+    except Exception as e:
+        return f"  Warning: thumbnail generation failed for {filepath.name}: {e}", False
+    return None, not existed
+
+
+def prepare_media_file(filepath, file_is_video, thumb_dir, thumb_width, force=False):
+    """Extract metadata and generate the thumbnail for one uncached media file.
+
+    Runs in a worker process during pass 1 of process_photos. Nothing is
+    printed here; messages are returned so the caller can print them in
+    file order. Files without GPS but with a timestamp get their thumbnail
+    here too, so pass 2 only has to interpolate coordinates.
+
+    Args:
+        filepath: Path to the photo or video.
+        file_is_video: Whether the file is a video.
+        thumb_dir: Path to directory for generated thumbnails.
+        thumb_width: Thumbnail width in pixels.
+        force: If True, regenerate even if the existing thumbnail is current.
+
+    Returns:
+        Dict with 'status' ('ok', 'deferred' when the file has no GPS and
+        needs interpolation, or 'failed'), 'coords', 'date', 'dt',
+        'messages' as a list of (text, to_stderr) pairs, and for deferred
+        files 'thumb_error' and 'thumb_created' from create_deferred_thumbnail.
+    """
+    filename = filepath.name
+    thumb_path = thumb_dir / (filepath.stem + '.jpg')
+    result = {'status': 'failed', 'coords': None, 'date': '', 'dt': None, 'messages': [],
+              'thumb_error': None, 'thumb_created': False}
+    messages = result['messages']
+
+    if file_is_video:
+        coords = extract_video_gps(filepath)
+        result['date'] = extract_video_date(filepath)
+        result['dt'] = extract_video_datetime(filepath)
+        if coords is None:
+            result['status'] = 'deferred'
+            if result['dt'] is not None:
+                result['thumb_error'], result['thumb_created'] = create_deferred_thumbnail(
+                    filepath, None, thumb_path, thumb_width, force)
+            return result
+        result['coords'] = coords
+
+        # Generate thumbnail from video frame
+        if not force and thumbnail_is_current(filepath, thumb_path, thumb_width):
+            result['status'] = 'ok'
+            return result
+        try:
+            create_video_thumbnail(filepath, thumb_path, thumb_width)
+            if not thumb_path.exists():
+                messages.append((f"  Warning: video thumbnail generation failed for {filename}", True))
+                return result
+        except Exception as e:
+            messages.append((f"  Warning: video thumbnail generation failed: {e}", True))
+            return result
+        result['status'] = 'ok'
+        return result
+
+    try:
+        image = Image.open(filepath)
+    except Exception as e:
+        messages.append((f"  Skipping (cannot open): {e}", True))
+        return result
+
+    with image:
+        # Extract EXIF
+        try:
+            exif_data = image.getexif()
+        except Exception:
+            messages.append(("  Skipping (no EXIF data)", False))
+            return result
+
+        coords = extract_gps(exif_data)
+        result['date'] = extract_date(exif_data)
+        result['dt'] = extract_datetime(exif_data)
+        if coords is None:
+            result['status'] = 'deferred'
+            if result['dt'] is not None:
+                result['thumb_error'], result['thumb_created'] = create_deferred_thumbnail(
+                    filepath, image, thumb_path, thumb_width, force)
+            return result
+        result['coords'] = coords
+
+        # Generate thumbnail
+        if not force and thumbnail_is_current(filepath, thumb_path, thumb_width):
+            result['status'] = 'ok'
+            return result
+        try:
+            create_thumbnail(image, thumb_path, thumb_width)
+        except Exception as e:
+            messages.append((f"  Warning: thumbnail generation failed: {e}", True))
+            return result
+        result['status'] = 'ok'
+        return result
+
+
 def process_photos(photo_dir, thumb_dir, thumb_width, output_path, force=False,
-                    firebase_key=None, firebase_bucket=None):
+                    firebase_key=None, firebase_bucket=None, workers=None, pretty=False):
     """Process all photos and generate manifest.
 
     Args:
@@ -624,6 +955,8 @@ def process_photos(photo_dir, thumb_dir, thumb_width, output_path, force=False,
         force: If True, bypass cache and reprocess everything.
         firebase_key: Path to Firebase service account key JSON (for video upload).
         firebase_bucket: Firebase Storage bucket name (for video upload).
+        workers: Number of processes for thumbnail/metadata work (None for CPU count).
+        pretty: If True, indent manifest.json and annotations.json for reading.
     """
     photo_dir = Path(photo_dir)
     thumb_dir = Path(thumb_dir)
@@ -644,6 +977,8 @@ def process_photos(photo_dir, thumb_dir, thumb_width, output_path, force=False,
     has_ffmpeg = shutil.which('ffmpeg') is not None and shutil.which('ffprobe') is not None
     if not has_ffmpeg:
         print("Warning: ffmpeg/ffprobe not found. Videos will be skipped.", file=sys.stderr)
+    if not features.check_feature('libjpeg_turbo'):
+        print("Warning: Pillow is not built with libjpeg-turbo; thumbnails will be slower.", file=sys.stderr)
 
     # Initialize Firebase for video upload if credentials provided
     fb_bucket = None
@@ -664,170 +999,92 @@ def process_photos(photo_dir, thumb_dir, thumb_width, output_path, force=False,
     # Cache setup
     cache_path = data_dir / '.process_cache.json'
     cache = {} if force else load_cache(cache_path)
-    existing_manifest = {} if force else load_existing_manifest(output_path)
     new_cache = {}
 
     # Collect media files (images + videos)
     all_extensions = SUPPORTED_EXTENSIONS | VIDEO_EXTENSIONS
-    files = sorted([
-        f for f in photo_dir.iterdir()
-        if f.is_file() and f.suffix.lower() in all_extensions
-    ])
+    # scandir entries cache their stat() result, so each file is stat'ed once
+    with os.scandir(photo_dir) as it:
+        entries = sorted(
+            (entry for entry in it
+             if entry.is_file() and os.path.splitext(entry.name)[1].lower() in all_extensions),
+            key=lambda entry: entry.name)
+    files = [Path(entry.path) for entry in entries]
 
     if not files:
         print("No supported media files found in", photo_dir)
         # Write empty manifest
-        with open(output_path, 'w') as f:
-            json.dump([], f, indent=2)
+        write_json(output_path, [], pretty=pretty)
         save_cache(cache_path, {})
         return
 
     skipped = 0
     processed = 0
     interpolated = 0
-    no_gps_files = []  # (filepath, image_or_none, exif_or_none, is_vid) for second pass
+    no_gps_files = []  # (filepath, datetime_or_none, date, is_vid, thumb_error, thumb_created)
 
     # Pass 1: Process files with native GPS, collect GPS references for interpolation
     gps_references = []  # (datetime, lat, lng) sorted later
 
-    for filepath in files:
-        filename = filepath.name
+    # Decide up front which files need processing, so the worker pool can
+    # start on them while cached entries are handled below
+    work = []  # (filepath, file_is_video, stat_or_none, cached_entry, is_cached)
+    for filepath, dir_entry in zip(files, entries):
         file_is_video = is_video(filepath)
-
-        # Skip videos if ffmpeg not available
         if file_is_video and not has_ffmpeg:
-            print(f"  Skipping video (no ffmpeg): {filename}")
+            work.append((filepath, file_is_video, None, None, False))
             continue
-
-        stat = filepath.stat()
-        file_mtime = stat.st_mtime
-        file_size = stat.st_size
-
+        stat = dir_entry.stat()
         # Check cache: skip if file unchanged and already in manifest
-        cached_entry = cache.get(filename)
-        photo_url = f'photos/{filename}'
-        if (not force
-                and cached_entry
-                and cached_entry.get('mtime') == file_mtime
-                and cached_entry.get('size') == file_size
-                and photo_url in existing_manifest):
-            # Reuse cached entry but re-merge notes for caption/tag changes
-            entry = existing_manifest[photo_url].copy()
-            entry = merge_notes_into_entry(entry, notes, filename)
-            # Preserve video streaming URLs from cache
-            if file_is_video and cached_entry.get('transcoded'):
-                entry['web_url'] = cached_entry.get('video_720p_url', entry.get('web_url', ''))
-                entry['web_url_full'] = cached_entry.get('video_full_url', '')
-            # Transcode cached video that hasn't been transcoded yet
-            elif file_is_video and fb_bucket and has_ffmpeg and not cached_entry.get('transcoded'):
-                print(f"  Transcoding (cached, first-time) {filename}...")
-                path_720p, path_full = transcode_video(filepath, transcode_dir)
-                if path_720p and path_full:
-                    stem = filepath.stem
-                    url_720p = upload_video_to_firebase(
-                        path_720p, f'videos/720p/{stem}.mp4', fb_bucket)
-                    url_full = upload_video_to_firebase(
-                        path_full, f'videos/full/{stem}.mp4', fb_bucket)
-                    if url_720p:
-                        entry['web_url'] = url_720p
-                        if url_full:
-                            entry['web_url_full'] = url_full
-                        cached_entry = cached_entry.copy()
-                        cached_entry['transcoded'] = True
-                        cached_entry['video_720p_url'] = url_720p
-                        cached_entry['video_full_url'] = url_full or ''
-                        print(f"  Uploaded video: {stem}")
-                    if path_720p.exists():
-                        path_720p.unlink()
-                    if path_full.exists():
-                        path_full.unlink()
-                else:
-                    print(f"  Warning: transcoding failed for {filename}", file=sys.stderr)
-            new_cache[filename] = cached_entry.copy() if isinstance(cached_entry, dict) else {'mtime': file_mtime, 'size': file_size}
-            new_cache[filename]['mtime'] = file_mtime
-            new_cache[filename]['size'] = file_size
-            # Check if photo was excluded
-            if entry is None:
-                print(f"  Skipping (excluded): {filename}")
-                skipped += 1
+        cached_entry = cache.get(filepath.name)
+        is_unchanged = (not force
+                        and cached_entry
+                        and cached_entry.get('mtime') == stat.st_mtime
+                        and cached_entry.get('size') == stat.st_size)
+        work.append((filepath, file_is_video, stat, cached_entry, is_unchanged))
+
+    # Only entries for unchanged files can be reused, so keep just those
+    needed_urls = {f'photos/{filepath.name}'
+                   for filepath, _, _, _, is_unchanged in work if is_unchanged}
+    existing_manifest = load_existing_manifest(output_path, needed_urls) if needed_urls else {}
+    work = [(filepath, file_is_video, stat, cached_entry,
+             bool(is_unchanged) and f'photos/{filepath.name}' in existing_manifest)
+            for filepath, file_is_video, stat, cached_entry, is_unchanged in work]
+    pending = [(filepath, file_is_video)
+               for filepath, file_is_video, stat, _, is_cached in work
+               if stat is not None and not is_cached]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() yields results in submission order, i.e. file order
+        prepared = executor.map(
+            functools.partial(prepare_media_file, thumb_dir=thumb_dir, thumb_width=thumb_width,
+                              force=force),
+            [filepath for filepath, _ in pending],
+            [file_is_video for _, file_is_video in pending])
+
+        for filepath, file_is_video, stat, cached_entry, is_cached in work:
+            filename = filepath.name
+
+            # Skip videos if ffmpeg not available
+            if stat is None:
+                print(f"  Skipping video (no ffmpeg): {filename}")
                 continue
-            manifest.append(entry)
-            # Still add to GPS references for interpolation
-            if file_is_video:
-                coords = extract_video_gps(filepath)
-                dt = extract_video_datetime(filepath)
-            else:
-                try:
-                    image = Image.open(filepath)
-                    exif_data = image.getexif()
-                    coords = extract_gps(exif_data)
-                    dt = extract_datetime(exif_data)
-                except Exception:
-                    coords = None
-                    dt = None
-            if coords and dt:
-                gps_references.append((dt, coords[0], coords[1]))
-            skipped += 1
-            continue
-
-        print(f"Processing: {filename}")
-
-        if file_is_video:
-            # Video processing path
-            coords = extract_video_gps(filepath)
-            if coords is None:
-                # Defer to pass 2 for GPS interpolation
-                no_gps_files.append((filepath, None, None, True))
-                continue
-
-            lat, lng = coords
-            date = extract_video_date(filepath)
 
-            # Collect GPS reference for interpolation
-            dt = extract_video_datetime(filepath)
-            if dt:
-                gps_references.append((dt, lat, lng))
-
-            # Generate thumbnail from video frame
-            thumb_filename = filepath.stem + '.jpg'
-            thumb_path = thumb_dir / thumb_filename
-            try:
-                create_video_thumbnail(filepath, thumb_path, thumb_width)
-                if not thumb_path.exists():
-                    print(f"  Warning: video thumbnail generation failed for {filename}", file=sys.stderr)
-                    continue
-            except Exception as e:
-                print(f"  Warning: video thumbnail generation failed: {e}", file=sys.stderr)
-                continue
-
-            # Merge notes
-            file_notes = notes.get(filename, {})
-            caption = file_notes.get('caption', '')
-            tags = file_notes.get('tags', [])
-            if isinstance(tags, str):
-                tags = [t.strip() for t in tags.split(',')]
-            google_photos_url = file_notes.get('google_photos_url', '')
-
-            # Check exclude flag
-            if file_notes.get('exclude', False):
-                print(f"  Skipping (excluded): {filename}")
-                new_cache[filename] = {'mtime': file_mtime, 'size': file_size}
-                continue
-
-            # Transcode and upload video if Firebase is configured
-            video_720p_url = ''
-            video_full_url = ''
-            transcoded = False
-            if fb_bucket and has_ffmpeg:
-                # Check if already transcoded in cache
-                if (cached_entry and cached_entry.get('transcoded')
-                        and cached_entry.get('video_720p_url')):
-                    video_720p_url = cached_entry['video_720p_url']
-                    video_full_url = cached_entry.get('video_full_url', '')
-                    transcoded = True
-                    print(f"  Using cached video URLs for {filename}")
-                else:
-                    print(f"  Transcoding {filename}...")
+            file_mtime = stat.st_mtime
+            file_size = stat.st_size
+            photo_url = f'photos/{filename}'
+
+            if is_cached:
+                # Reuse cached entry but re-merge notes for caption/tag changes
+                entry = existing_manifest[photo_url].copy()
+                entry = merge_notes_into_entry(entry, notes, filename)
+                # Preserve video streaming URLs from cache
+                if file_is_video and cached_entry.get('transcoded'):
+                    entry['web_url'] = cached_entry.get('video_720p_url', entry.get('web_url', ''))
+                    entry['web_url_full'] = cached_entry.get('video_full_url', '')
+                # Transcode cached video that hasn't been transcoded yet
+                elif file_is_video and fb_bucket and has_ffmpeg and not cached_entry.get('transcoded'):
+                    print(f"  Transcoding (cached, first-time) {filename}...")
                     path_720p, path_full = transcode_video(filepath, transcode_dir)
                     if path_720p and path_full:
                         stem = filepath.stem
@@ -836,158 +1093,188 @@ def process_photos(photo_dir, thumb_dir, thumb_width, output_path, force=False,
                         url_full = upload_video_to_firebase(
                             path_full, f'videos/full/{stem}.mp4', fb_bucket)
                         if url_720p:
-                            video_720p_url = url_720p
-                            video_full_url = url_full or ''
-                            transcoded = True
+                            entry['web_url'] = url_720p
+                            if url_full:
+                                entry['web_url_full'] = url_full
+                            cached_entry = cached_entry.copy()
+                            cached_entry['transcoded'] = True
+                            cached_entry['video_720p_url'] = url_720p
+                            cached_entry['video_full_url'] = url_full or ''
                             print(f"  Uploaded video: {stem}")
-                        # Clean up local transcoded files
                         if path_720p.exists():
                             path_720p.unlink()
                         if path_full.exists():
                             path_full.unlink()
                     else:
-                        print(f"  Warning: transcoding failed for {filename}, using Drive URL", file=sys.stderr)
-
-            # Use Firebase streaming URL if available, fall back to Drive preview
-            web_url = video_720p_url if video_720p_url else derive_video_web_url(google_photos_url)
-
-            entry = {
-                'lat': round(lat, 6),
-                'lng': round(lng, 6),
-                'url': photo_url,
-                'thumbnail': f'thumbs/{thumb_filename}',
-                'caption': caption,
-                'date': date,
-                'datetime': dt.isoformat() if dt else '',
-                'tags': tags,
-                'google_photos_url': google_photos_url,
-                'web_url': web_url,
-                'type': 'video',
-            }
-            if video_full_url:
-                entry['web_url_full'] = video_full_url
-
-            manifest.append(entry)
-            cache_entry = {'mtime': file_mtime, 'size': file_size}
-            if transcoded:
-                cache_entry['transcoded'] = True
-                cache_entry['video_720p_url'] = video_720p_url
-                cache_entry['video_full_url'] = video_full_url
-            new_cache[filename] = cache_entry
-            processed += 1
-            print(f"  OK (video): ({lat:.4f}, {lng:.4f}) {date}")
-        else:
-            # Image processing path
-            try:
-                image = Image.open(filepath)
-            except Exception as e:
-                print(f"  Skipping (cannot open): {e}", file=sys.stderr)
+                        print(f"  Warning: transcoding failed for {filename}", file=sys.stderr)
+                new_cache[filename] = cached_entry.copy() if isinstance(cached_entry, dict) else {'mtime': file_mtime, 'size': file_size}
+                new_cache[filename]['mtime'] = file_mtime
+                new_cache[filename]['size'] = file_size
+                # Check if photo was excluded
+                if entry is None:
+                    print(f"  Skipping (excluded): {filename}")
+                    skipped += 1
+                    continue
+                manifest.append(entry)
+                # Still add to GPS references for interpolation. Caches
+                # written before the reference was stored need the file
+                # reread once.
+                cache_entry = new_cache[filename]
+                if 'ref_dt' not in cache_entry:
+                    if file_is_video:
+                        coords = extract_video_gps(filepath)
+                        dt = extract_video_datetime(filepath)
+                    else:
+                        try:
+                            with Image.open(filepath) as image:
+                                exif_data = image.getexif()
+                                coords = extract_gps(exif_data)
+                                dt = extract_datetime(exif_data)
+                        except Exception:
+                            coords = None
+                            dt = None
+                    cache_entry.update(gps_reference_fields(coords, dt))
+                if cache_entry['ref_dt']:
+                    gps_references.append((datetime.fromisoformat(cache_entry['ref_dt']),
+                                           cache_entry['ref_lat'], cache_entry['ref_lng']))
+                skipped += 1
                 continue
 
-            # Extract EXIF
-            try:
-                exif_data = image.getexif()
-            except Exception:
-                print(f"  Skipping (no EXIF data)")
-                continue
+            print(f"Processing: {filename}")
+            result = next(prepared)
+            for message, to_stderr in result['messages']:
+                print(message, file=sys.stderr if to_stderr else sys.stdout)
 
-            # Extract GPS
-            coords = extract_gps(exif_data)
-            if coords is None:
+            coords = result['coords']
+            date = result['date']
+            dt = result['dt']
+            if result['status'] == 'deferred':
                 # Defer to pass 2 for GPS interpolation
-                no_gps_files.append((filepath, image, exif_data, False))
+                no_gps_files.append((filepath, dt, date, file_is_video,
+                                     result['thumb_error'], result['thumb_created']))
                 continue
 
-            lat, lng = coords
-            date = extract_date(exif_data)
-
             # Collect GPS reference for interpolation
-            dt = extract_datetime(exif_data)
-            if dt:
-                gps_references.append((dt, lat, lng))
-
-            # Generate thumbnail
-            thumb_filename = filepath.stem + '.jpg'
-            thumb_path = thumb_dir / thumb_filename
-            try:
-                create_thumbnail(image.copy(), thumb_path, thumb_width)
-            except Exception as e:
-                print(f"  Warning: thumbnail generation failed: {e}", file=sys.stderr)
+            if coords and dt:
+                gps_references.append((dt, coords[0], coords[1]))
+            if result['status'] != 'ok':
                 continue
 
-            # Merge notes
-            file_notes = notes.get(filename, {})
-            caption = file_notes.get('caption', '')
-            tags = file_notes.get('tags', [])
-            if isinstance(tags, str):
-                tags = [t.strip() for t in tags.split(',')]
-            google_photos_url = file_notes.get('google_photos_url', '')
-
-            # Check exclude flag
-            if file_notes.get('exclude', False):
-                print(f"  Skipping (excluded): {filename}")
-                new_cache[filename] = {'mtime': file_mtime, 'size': file_size}
-                continue
+            lat, lng = coords
+
+            if file_is_video:
+                # Merge notes
+                file_notes = notes.get(filename, {})
+                caption = file_notes.get('caption', '')
+                tags = file_notes.get('tags', [])
+                if isinstance(tags, str):
+                    tags = [t.strip() for t in tags.split(',')]
+                google_photos_url = file_notes.get('google_photos_url', '')
+
+                # Check exclude flag
+                if file_notes.get('exclude', False):
+                    print(f"  Skipping (excluded): {filename}")
+                    new_cache[filename] = {'mtime': file_mtime, 'size': file_size}
+                    continue
+
+                # Transcode and upload video if Firebase is configured
+                video_720p_url = ''
+                video_full_url = ''
+                transcoded = False
+                if fb_bucket and has_ffmpeg:
+                    # Check if already transcoded in cache
+                    if (cached_entry and cached_entry.get('transcoded')
+                            and cached_entry.get('video_720p_url')):
+                        video_720p_url = cached_entry['video_720p_url']
+                        video_full_url = cached_entry.get('video_full_url', '')
+                        transcoded = True
+                        print(f"  Using cached video URLs for {filename}")
+                    else:
+                        print(f"  Transcoding {filename}...")
+                        path_720p, path_full = transcode_video(filepath, transcode_dir)
+                        if path_720p and path_full:
+                            stem = filepath.stem
+                            url_720p = upload_video_to_firebase(
+                                path_720p, f'videos/720p/{stem}.mp4', fb_bucket)
+                            url_full = upload_video_to_firebase(
+                                path_full, f'videos/full/{stem}.mp4', fb_bucket)
+                            if url_720p:
+                                video_720p_url = url_720p
+                                video_full_url = url_full or ''
+                                transcoded = True
+                                print(f"  Uploaded video: {stem}")
+                            # Clean up local transcoded files
+                            if path_720p.exists():
+                                path_720p.unlink()
+                            if path_full.exists():
+                                path_full.unlink()
+                        else:
+                            print(f"  Warning: transcoding failed for {filename}, using Drive URL", file=sys.stderr)
+
+                # Use Firebase streaming URL if available, fall back to Drive preview
+                web_url = video_720p_url if video_720p_url else derive_video_web_url(google_photos_url)
+
+                entry = build_manifest_entry(filepath, lat, lng, date, dt, caption, tags,
+                                             google_photos_url, web_url, 'video')
+                if video_full_url:
+                    entry['web_url_full'] = video_full_url
+
+                manifest.append(entry)
+                cache_entry = {'mtime': file_mtime, 'size': file_size, **gps_reference_fields(coords, dt)}
+                if transcoded:
+                    cache_entry['transcoded'] = True
+                    cache_entry['video_720p_url'] = video_720p_url
+                    cache_entry['video_full_url'] = video_full_url
+                new_cache[filename] = cache_entry
+                processed += 1
+                print(f"  OK (video): ({lat:.4f}, {lng:.4f}) {date}")
+            else:
+                # Merge notes
+                file_notes = notes.get(filename, {})
+                caption = file_notes.get('caption', '')
+                tags = file_notes.get('tags', [])
+                if isinstance(tags, str):
+                    tags = [t.strip() for t in tags.split(',')]
+                google_photos_url = file_notes.get('google_photos_url', '')
+
+                # Check exclude flag
+                if file_notes.get('exclude', False):
+                    print(f"  Skipping (excluded): {filename}")
+                    new_cache[filename] = {'mtime': file_mtime, 'size': file_size}
+                    continue
 
-            entry = {
-                'lat': round(lat, 6),
-                'lng': round(lng, 6),
-                'url': photo_url,
-                'thumbnail': f'thumbs/{thumb_filename}',
-                'caption': caption,
-                'date': date,
-                'datetime': dt.isoformat() if dt else '',
-                'tags': tags,
-                'google_photos_url': google_photos_url,
-                'web_url': derive_web_url(google_photos_url),
-                'type': 'photo',
-            }
-            manifest.append(entry)
-            new_cache[filename] = {'mtime': file_mtime, 'size': file_size}
-            processed += 1
-            print(f"  OK: ({lat:.4f}, {lng:.4f}) {date}")
+                entry = build_manifest_entry(filepath, lat, lng, date, dt, caption, tags,
+                                             google_photos_url, derive_web_url(google_photos_url),
+                                             'photo')
+                manifest.append(entry)
+                new_cache[filename] = {'mtime': file_mtime, 'size': file_size,
+                                       **gps_reference_fields(coords, dt)}
+                processed += 1
+                print(f"  OK: ({lat:.4f}, {lng:.4f}) {date}")
 
     # Pass 2: Interpolate GPS for media without native coordinates
     gps_references.sort(key=lambda x: x[0])
+    ref_times = [ref_dt for ref_dt, _, _ in gps_references]
+    ref_coords = [(lat, lng) for _, lat, lng in gps_references]
 
-    for filepath, image, exif_data, file_is_video in no_gps_files:
+    for filepath, dt, date, file_is_video, thumb_error, thumb_created in no_gps_files:
         filename = filepath.name
-        photo_url = f'photos/{filename}'
-
-        if file_is_video:
-            dt = extract_video_datetime(filepath)
-        else:
-            dt = extract_datetime(exif_data)
 
         if dt is None:
             print(f"  Skipping {filename} (no GPS, no timestamp for interpolation)")
             continue
 
-        match = find_nearest_gps(dt, gps_references)
+        match = find_nearest_gps(dt, ref_times, ref_coords)
         if match is None:
             print(f"  Skipping {filename} (no GPS, no nearby reference)")
+            # Don't leave behind the thumbnail pass 1 built in case of a match
+            if thumb_created:
+                (thumb_dir / (filepath.stem + '.jpg')).unlink(missing_ok=True)
             continue
 
         lat, lng, gap = match
-
-        if file_is_video:
-            date = extract_video_date(filepath)
-        else:
-            date = extract_date(exif_data)
-
-        # Generate thumbnail
-        thumb_filename = filepath.stem + '.jpg'
-        thumb_path = thumb_dir / thumb_filename
-        try:
-            if file_is_video:
-                create_video_thumbnail(filepath, thumb_path, thumb_width)
-                if not thumb_path.exists():
-                    print(f"  Warning: video thumbnail generation failed for {filename}", file=sys.stderr)
-                    continue
-            else:
-                create_thumbnail(image.copy(), thumb_path, thumb_width)
-        except Exception as e:
-            print(f"  Warning: thumbnail generation failed for {filename}: {e}", file=sys.stderr)
+        if thumb_error:
+            print(thumb_error, file=sys.stderr)
             continue
 
         # Merge notes
@@ -1033,25 +1320,16 @@ def process_photos(photo_dir, thumb_dir, thumb_width, output_path, force=False,
         else:
             web_url = derive_web_url(google_photos_url)
 
-        entry = {
-            'lat': round(lat, 6),
-            'lng': round(lng, 6),
-            'url': photo_url,
-            'thumbnail': f'thumbs/{thumb_filename}',
-            'caption': caption,
-            'date': date,
-            'datetime': dt.isoformat() if dt else '',
-            'tags': tags,
-            'google_photos_url': google_photos_url,
-            'web_url': web_url,
-            'type': 'video' if file_is_video else 'photo',
-        }
+        entry = build_manifest_entry(filepath, lat, lng, date, dt, caption, tags,
+                                     google_photos_url, web_url,
+                                     'video' if file_is_video else 'photo')
         if file_is_video and video_full_url:
             entry['web_url_full'] = video_full_url
 
         manifest.append(entry)
         stat = filepath.stat()
-        cache_entry = {'mtime': stat.st_mtime, 'size': stat.st_size}
+        # Interpolated coordinates are never used as a reference
+        cache_entry = {'mtime': stat.st_mtime, 'size': stat.st_size, **gps_reference_fields(None, dt)}
         if transcoded:
             cache_entry['transcoded'] = True
             cache_entry['video_720p_url'] = video_720p_url
@@ -1063,16 +1341,14 @@ def process_photos(photo_dir, thumb_dir, thumb_width, output_path, force=False,
         print(f"  OK (interpolated, {label}{gap_min}m gap): ({lat:.4f}, {lng:.4f}) {date}")
 
     # Write manifest
-    with open(output_path, 'w') as f:
-        json.dump(manifest, f, indent=2)
+    write_json(output_path, manifest, pretty=pretty)
 
     # Save cache
     save_cache(cache_path, new_cache)
 
     # Write annotations
     annotations_path = data_dir / 'annotations.json'
-    with open(annotations_path, 'w') as f:
-        json.dump(annotations, f, indent=2)
+    write_json(annotations_path, annotations, pretty=pretty)
 
     print(f"\nDone: {len(manifest)} entries in manifest ({processed} processed, {interpolated} interpolated, {skipped} cached)")
     if annotations:
@@ -1111,10 +1387,22 @@ def main():
         '--firebase-bucket', default=None,
         help='Firebase Storage bucket name (e.g., travel-photo-map-e0bf4.firebasestorage.app)'
     )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help='Number of processes decoding photos and building thumbnails (default: CPU count)'
+    )
+    parser.add_argument(
+        '--pretty', action='store_true',
+        help='Indent manifest.json and annotations.json for readability (default: compact)'
+    )
     args = parser.parse_args()
 
+    if args.workers is not None and args.workers < 1:
+        print(f"Error: --workers must be at least 1 (got {args.workers}).", file=sys.stderr)
+        sys.exit(1)
+
     process_photos(args.photo_dir, args.thumb_dir, args.thumb_width, args.output, args.force,
-                   args.firebase_key, args.firebase_bucket)
+                   args.firebase_key, args.firebase_bucket, args.workers, args.pretty)
 
 
 if __name__ == '__main__':
@@ -7,6 +7,9 @@ and tracks sync state to avoid re-downloading.
 Requires:
     pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib
 
+The sync cache is read and written with orjson when it is installed
+(pip install orjson), else the json module.
+
 One-time setup:
     1. Create Google Cloud project, enable Drive API
     2. Create OAuth 2.0 credentials (Desktop app), download credentials.json
@@ -14,12 +17,20 @@ One-time setup:
 """
 
 import argparse
+import hashlib
 import json
 import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 IMAGE_MIMETYPES = {
     'image/jpeg', 'image/png', 'image/tiff', 'image/heic', 'image/heif',
@@ -34,6 +45,11 @@ MEDIA_MIMETYPES = IMAGE_MIMETYPES | VIDEO_MIMETYPES
 EXPORT_MIMETYPES = {
     'image/jpeg',
 }
+DEFAULT_DOWNLOAD_WORKERS = 8
+
+# Per-thread Drive service: the httplib2 connection under each service
+# object is not thread-safe, so download workers must not share one
+_thread_local = threading.local()
 
 
 def authenticate(credentials_file, token_file):
@@ -93,7 +109,8 @@ def list_drive_media(service, folder_id):
         folder_id: Google Drive folder ID.
 
     Returns:
-        List of dicts with id, name, mimeType, modifiedTime, size, webContentLink.
+        List of dicts with id, name, mimeType, modifiedTime, size, md5Checksum,
+        webContentLink, webViewLink.
     """
     media = []
     page_token = None
@@ -104,7 +121,8 @@ def list_drive_media(service, folder_id):
             return service.files().list(
                 q=query,
                 spaces='drive',
-                fields='nextPageToken, files(id, name, mimeType, modifiedTime, size, webContentLink)',
+                fields='nextPageToken, files(id, name, mimeType, modifiedTime, size, md5Checksum, '
+                       'webContentLink, webViewLink)',
                 pageToken=pt,
                 pageSize=1000,
             ).execute()
@@ -134,8 +152,8 @@ def load_sync_cache(cache_path):
     if not cache_path.exists():
         return {}
     try:
-        with open(cache_path, 'r') as f:
-            return json.load(f)
+        with open(cache_path, 'rb') as f:
+            return orjson.loads(f.read()) if orjson is not None else json.load(f)
     except Exception:
         return {}
 
@@ -143,13 +161,21 @@ def load_sync_cache(cache_path):
 def save_sync_cache(cache_path, cache):
     """Save sync cache.
 
+    Written to a temporary file and renamed over the old cache, so an
+    interrupted sync never leaves a truncated cache behind.
+
     Args:
         cache_path: Path to .drive_sync_cache.json.
         cache: Dict mapping filename to sync metadata.
     """
     cache_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(cache_path, 'w') as f:
-        json.dump(cache, f, indent=2)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    if orjson is not None:
+        tmp_path.write_bytes(orjson.dumps(cache, option=orjson.OPT_INDENT_2))
+    else:
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+    os.replace(tmp_path, cache_path)
 
 
 def retry_on_rate_limit(func, max_retries=5):
@@ -184,6 +210,10 @@ def retry_on_rate_limit(func, max_retries=5):
 def download_file(service, file_id, dest_path):
     """Download a file from Google Drive.
 
+    The file is written to a temporary file next to dest_path and renamed
+    into place once complete, so a failed or interrupted download never
+    leaves a truncated file behind.
+
     Args:
         service: Drive API service.
         file_id: Google Drive file ID.
@@ -191,38 +221,80 @@ def download_file(service, file_id, dest_path):
     """
     from googleapiclient.http import MediaIoBaseDownload
 
+    # Names are de-duplicated within a run and the pid separates concurrent
+    # runs; a plain open() keeps the usual umask-derived file mode
+    tmp_path = dest_path.with_name(f'.{dest_path.name}.{os.getpid()}.part')
+
     def _download():
         request = service.files().get_media(fileId=file_id)
-        with open(dest_path, 'wb') as f:
+        with open(tmp_path, 'wb') as f:
             downloader = MediaIoBaseDownload(f, request)
             done = False
             while not done:
                 _, done = downloader.next_chunk()
 
-    retry_on_rate_limit(_download)
+    try:
+        retry_on_rate_limit(_download)
+        os.replace(tmp_path, dest_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
 
+def share_credentials(creds):
+    """Let download threads share one set of credentials safely.
 
-def get_shareable_link(service, file_id):
-    """Get or create a shareable link for a Drive file.
+    Each thread's service refreshes the access token when it expires. The
+    refresh is serialized, and a thread that was waiting for another
+    thread's refresh reuses the new token instead of fetching its own.
 
     Args:
-        service: Drive API service.
-        file_id: Google Drive file ID.
+        creds: Authenticated credentials (patched in place).
 
     Returns:
-        Shareable URL string, or empty string on failure.
+        The same credentials object.
     """
-    try:
-        def _get_link():
-            return service.files().get(
-                fileId=file_id,
-                fields='webViewLink'
-            ).execute()
+    lock = threading.Lock()
+    refresh = creds.refresh
 
-        file_meta = retry_on_rate_limit(_get_link)
-        return file_meta.get('webViewLink', '')
-    except Exception:
-        return ''
+    def locked_refresh(request):
+        stale_token = creds.token
+        with lock:
+            if creds.token != stale_token and creds.valid:
+                return
+            refresh(request)
+
+    creds.refresh = locked_refresh
+    return creds
+
+
+def thread_service(creds):
+    """Return this thread's Drive service, building it on first use.
+
+    Args:
+        creds: Authenticated credentials.
+
+    Returns:
+        googleapiclient.discovery.Resource for Drive v3.
+    """
+    service = getattr(_thread_local, 'service', None)
+    if service is None:
+        service = _thread_local.service = build_service(creds)
+    return service
+
+
+def fetch_drive_file(creds, file_id, dest_path):
+    """Download one Drive file using this thread's service.
+
+    Runs in a download worker thread.
+
+    Args:
+        creds: Authenticated credentials.
+        file_id: Google Drive file ID.
+        dest_path: Local destination path.
+    """
+    download_file(thread_service(creds), file_id, dest_path)
+    # Brief pause between files to avoid rate limits
+    time.sleep(0.5)
 
 
 def load_notes_yaml(notes_path):
@@ -241,7 +313,8 @@ def load_notes_yaml(notes_path):
 
     try:
         with open(notes_path, 'r') as f:
-            data = yaml.safe_load(f)
+            # Prefer the libyaml C loader; same safe semantics, much faster
+            data = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
         if not isinstance(data, dict):
             return {'photos': {}, 'annotations': []}
 
@@ -272,7 +345,8 @@ def save_notes_yaml(notes_path, notes_data):
 
     notes_path.parent.mkdir(parents=True, exist_ok=True)
     with open(notes_path, 'w') as f:
-        yaml.dump(notes_data, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
+        yaml.dump(notes_data, f, Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper),
+                  default_flow_style=False, sort_keys=False, allow_unicode=True)
 
 
 def is_new_or_changed(filename, drive_file, cache):
@@ -296,8 +370,63 @@ def is_new_or_changed(filename, drive_file, cache):
     return False
 
 
+def local_copy_matches(dest_path, drive_file):
+    """Check whether a local file already has the Drive file's contents.
+
+    Compares size first, then the MD5 checksum Drive reports for the file.
+
+    Args:
+        dest_path: Local destination path.
+        drive_file: Drive file metadata dict.
+
+    Returns:
+        True if the local file can be kept as is.
+    """
+    expected_md5 = drive_file.get('md5Checksum')
+    if not expected_md5 or not dest_path.is_file():
+        return False
+    if str(dest_path.stat().st_size) != str(drive_file.get('size', '')):
+        return False
+    md5 = hashlib.md5()
+    with open(dest_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            md5.update(chunk)
+    return md5.hexdigest() == expected_md5
+
+
+def record_synced_file(drive_file, notes_data, cache):
+    """Record a synced file's shareable link and sync state.
+
+    Args:
+        drive_file: Drive file metadata dict.
+        notes_data: Dict with 'photos' and 'annotations' keys (mutated).
+        cache: Sync cache dict (mutated).
+
+    Returns:
+        True if notes_data was changed.
+    """
+    filename = drive_file['name']
+    notes_changed = False
+
+    # Record shareable link (returned by the listing) in notes.yaml
+    link = drive_file.get('webViewLink', '')
+    if link:
+        photo_notes = notes_data['photos'].setdefault(filename, {})
+        if photo_notes.get('google_photos_url') != link:
+            photo_notes['google_photos_url'] = link
+            notes_changed = True
+
+    # Update cache
+    cache[filename] = {
+        'drive_id': drive_file['id'],
+        'modified_time': drive_file.get('modifiedTime', ''),
+        'size': drive_file.get('size', ''),
+    }
+    return notes_changed
+
+
 def sync(folder_id, photo_dir, notes_file, credentials_file, token_file,
-         dry_run=False, force=False):
+         dry_run=False, force=False, workers=DEFAULT_DOWNLOAD_WORKERS):
     """Main sync logic: list Drive images, download new ones, update notes.yaml.
 
     Args:
@@ -308,6 +437,7 @@ def sync(folder_id, photo_dir, notes_file, credentials_file, token_file,
         token_file: Path to saved OAuth token.
         dry_run: If True, only list what would be downloaded.
         force: If True, re-download everything.
+        workers: Number of files downloaded concurrently.
     """
     photo_dir = Path(photo_dir)
     notes_path = Path(notes_file)
@@ -317,7 +447,7 @@ def sync(folder_id, photo_dir, notes_file, credentials_file, token_file,
     photo_dir.mkdir(parents=True, exist_ok=True)
 
     print("Authenticating with Google Drive...")
-    creds = authenticate(credentials_file, token_file)
+    creds = share_credentials(authenticate(credentials_file, token_file))
     service = build_service(creds)
 
     print(f"Listing media in folder {folder_id}...")
@@ -332,65 +462,92 @@ def sync(folder_id, photo_dir, notes_file, credentials_file, token_file,
     notes_data = load_notes_yaml(notes_path)
     new_cache = dict(cache) if not force else {}
 
+    # Drive allows several files with the same name in one folder. They all
+    # map to one local path, so keep only the last listed one, which is
+    # the file that used to end up on disk when downloads ran serially
+    latest_by_name = {}
+    for df in drive_images:
+        latest_by_name[df['name']] = df
+    duplicates = len(drive_images) - len(latest_by_name)
+    if duplicates:
+        print(f"Warning: {duplicates} file(s) share a name with another Drive file; "
+              f"keeping the last listed file for each name.", file=sys.stderr)
+    drive_images = list(latest_by_name.values())
+
     to_download = []
+    already_local = []
     for df in drive_images:
         filename = df['name']
-        if force or is_new_or_changed(filename, df, cache):
+        if force:
             to_download.append(df)
+        elif is_new_or_changed(filename, df, cache):
+            # A cache miss can still have the right bytes on disk (e.g. after
+            # losing the cache); only record those instead of re-downloading
+            if local_copy_matches(photo_dir / filename, df):
+                already_local.append(df)
+            else:
+                to_download.append(df)
 
-    if not to_download:
+    if not to_download and not already_local:
         print("All files are up to date. Nothing to download.")
         return
 
-    print(f"\n{len(to_download)} file(s) to {'download' if not dry_run else 'sync'}:")
-    for df in to_download:
-        size_mb = int(df.get('size', 0)) / (1024 * 1024)
-        print(f"  {df['name']} ({size_mb:.1f} MB)")
+    if already_local:
+        print(f"\n{len(already_local)} file(s) already match the local copy "
+              f"(cache entry {'refreshed' if not dry_run else 'would be refreshed'}).")
+
+    if to_download:
+        print(f"\n{len(to_download)} file(s) to {'download' if not dry_run else 'sync'}:")
+        for df in to_download:
+            size_mb = int(df.get('size', 0)) / (1024 * 1024)
+            print(f"  {df['name']} ({size_mb:.1f} MB)")
 
     if dry_run:
         print("\n(dry run — no files downloaded)")
         return
 
+    notes_changed = False
+    for df in already_local:
+        notes_changed |= record_synced_file(df, notes_data, new_cache)
+
     downloaded = 0
     errors = 0
-    for df in to_download:
-        filename = df['name']
-        dest = photo_dir / filename
-        print(f"Downloading: {filename}...", end=' ', flush=True)
-
+    if to_download:
+        print(f"\nDownloading with {workers} worker(s)...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(fetch_drive_file, creds, df['id'], photo_dir / df['name'])
+                   for df in to_download]
+        # Collect in listing order so notes.yaml entries are added
+        # deterministically; only the main thread touches notes/cache
         try:
-            download_file(service, df['id'], dest)
-            print("OK")
-        except Exception as e:
-            print(f"FAILED: {e}", file=sys.stderr)
-            errors += 1
-            continue
-
-        # Get shareable link and update notes.yaml
-        link = get_shareable_link(service, df['id'])
-        if link:
-            if filename not in notes_data['photos']:
-                notes_data['photos'][filename] = {}
-            notes_data['photos'][filename]['google_photos_url'] = link
-
-        # Update cache
-        new_cache[filename] = {
-            'drive_id': df['id'],
-            'modified_time': df.get('modifiedTime', ''),
-            'size': df.get('size', ''),
-        }
-        downloaded += 1
-
-        # Brief pause between files to avoid rate limits
-        time.sleep(0.5)
+            for df, future in zip(to_download, futures):
+                filename = df['name']
+                try:
+                    future.result()
+                    print(f"Downloaded: {filename}")
+                except Exception as e:
+                    print(f"FAILED: {filename}: {e}", file=sys.stderr)
+                    errors += 1
+                    continue
+
+                notes_changed |= record_synced_file(df, notes_data, new_cache)
+                downloaded += 1
+        except BaseException:
+            # Leaving the with-block would otherwise wait for every queued
+            # download before Ctrl-C takes effect
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
 
     # Save updated state
     save_sync_cache(cache_path, new_cache)
-    save_notes_yaml(notes_path, notes_data)
+    # notes.yaml is hand-edited and can be large; leave it alone unless
+    # a link was actually added or changed
+    if notes_changed:
+        save_notes_yaml(notes_path, notes_data)
 
     print(f"\nDone: {downloaded} downloaded, {errors} errors, "
           f"{len(drive_images) - len(to_download)} already up to date.")
-    print(f"Notes updated: {notes_path}")
+    print(f"Notes {'updated' if notes_changed else 'unchanged'}: {notes_path}")
     print(f"\nNext step: python scripts/process_photos.py")
 
 
@@ -448,8 +605,16 @@ def main():
         '--force', action='store_true',
         help='Re-download all files, ignoring cache'
     )
+    parser.add_argument(
+        '--workers', type=int, default=DEFAULT_DOWNLOAD_WORKERS,
+        help=f'Number of files to download concurrently (default: {DEFAULT_DOWNLOAD_WORKERS})'
+    )
     args = parser.parse_args()
 
+    if args.workers < 1:
+        print(f"Error: --workers must be at least 1 (got {args.workers}).", file=sys.stderr)
+        sys.exit(1)
+
     if args.setup:
         setup(args.credentials, args.token)
         return
@@ -465,6 +630,7 @@ def main():
         token_file=args.token,
         dry_run=args.dry_run,
         force=args.force,
+        workers=args.workers,
     )
 
 
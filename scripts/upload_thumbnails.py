@@ -8,6 +8,9 @@ Usage:
         --manifest data/manifest.json
 
 Incremental mode: thumbnails already pointing to Firebase Storage URLs are skipped.
+
+The manifest is read and written with orjson when it is installed
+(pip install orjson), else the json module.
 """
 
 import argparse
@@ -15,12 +18,26 @@ import json
 import os
 import sys
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import firebase_admin
 from firebase_admin import credentials, storage
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 FIREBASE_STORAGE_MARKER = "firebasestorage.googleapis.com"
+CONTENT_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+}
+DEFAULT_UPLOAD_WORKERS = 16
 
 
 def build_public_url(bucket_name, storage_path):
@@ -32,6 +49,60 @@ def build_public_url(bucket_name, storage_path):
     )
 
 
+def write_manifest(manifest_path, manifest, pretty=False):
+    """Atomically write the manifest, compact unless pretty is set.
+
+    Uses the same format as process_photos.py so the committed manifest
+    does not change layout depending on which script wrote it last.
+    Writes a temporary file and renames it over the manifest, so an
+    interrupted run never leaves a truncated manifest behind.
+    """
+    tmp_path = manifest_path + ".tmp"
+    if orjson is not None:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        with open(tmp_path, "w") as f:
+            if pretty:
+                json.dump(manifest, f, indent=2)
+            else:
+                json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp_path, manifest_path)
+
+
+def size_connection_pool(bucket, workers):
+    """Let every upload worker keep its own pooled HTTPS connection.
+
+    The storage client's requests session keeps at most 10 connections per
+    host by default; with more workers, the extra connections are closed
+    after each request and every later upload pays a new TLS handshake.
+    """
+    from requests.adapters import HTTPAdapter
+
+    # google-cloud-storage exposes no public hook for the pool size, so this
+    # relies on the client's private _http session (an AuthorizedSession).
+    # Leave it alone if that changes shape, or if google-auth installed its
+    # own adapter (e.g. for mTLS), which must not be replaced.
+    session = getattr(bucket.client, "_http", None)
+    if session is None or not hasattr(session, "get_adapter"):
+        return
+    current = session.get_adapter("https://")
+    if type(current) is not HTTPAdapter:
+        return
+    session.mount("https://", HTTPAdapter(pool_maxsize=max(workers, 10),
+                                          max_retries=current.max_retries))
+
+
+def upload_thumbnail(bucket, local_path, storage_path):
+    """Upload one thumbnail file to Firebase Storage.
+
+    Runs in an upload worker thread; the bucket client is shared.
+    """
+    ext = os.path.splitext(storage_path)[1].lower()
+    content_type = CONTENT_TYPES.get(ext, "application/octet-stream")
+    bucket.blob(storage_path).upload_from_filename(local_path, content_type=content_type)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Upload thumbnails to Firebase Storage and update manifest"
@@ -52,8 +123,23 @@ def main():
         action="store_true",
         help="Show what would be uploaded without uploading",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_UPLOAD_WORKERS,
+        help=f"Number of concurrent uploads (default: {DEFAULT_UPLOAD_WORKERS})",
+    )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent the rewritten manifest.json for readability (default: compact)",
+    )
     args = parser.parse_args()
 
+    if args.workers < 1:
+        print(f"Error: --workers must be at least 1 (got {args.workers}).", file=sys.stderr)
+        sys.exit(1)
+
     if not os.path.exists(args.key):
         print(f"Error: Service account key not found: {args.key}", file=sys.stderr)
         sys.exit(1)
@@ -68,12 +154,17 @@ def main():
     bucket = storage.bucket()
 
     # Load manifest
-    with open(args.manifest, "r") as f:
-        manifest = json.load(f)
+    with open(args.manifest, "rb") as f:
+        manifest = orjson.loads(f.read()) if orjson is not None else json.load(f)
+
+    # Resolve local thumbnail paths relative to manifest location
+    manifest_dir = os.path.dirname(os.path.abspath(args.manifest))
+    project_root = os.path.dirname(manifest_dir)
 
     uploaded = 0
     skipped = 0
     errors = 0
+    pending = []
 
     for i, entry in enumerate(manifest):
         thumbnail = entry.get("thumbnail", "")
@@ -83,9 +174,6 @@ def main():
             skipped += 1
             continue
 
-        # Resolve local thumbnail path relative to manifest location
-        manifest_dir = os.path.dirname(os.path.abspath(args.manifest))
-        project_root = os.path.dirname(manifest_dir)
         local_path = os.path.join(project_root, thumbnail)
 
         if not os.path.exists(local_path):
@@ -103,35 +191,45 @@ def main():
             uploaded += 1
             continue
 
-        try:
-            blob = bucket.blob(storage_path)
-            # Determine content type
-            ext = os.path.splitext(filename)[1].lower()
-            content_type = {
-                ".jpg": "image/jpeg",
-                ".jpeg": "image/jpeg",
-                ".png": "image/png",
-                ".webp": "image/webp",
-                ".gif": "image/gif",
-            }.get(ext, "application/octet-stream")
-
-            blob.upload_from_filename(local_path, content_type=content_type)
-
-            cloud_url = build_public_url(args.bucket, storage_path)
-            entry["thumbnail"] = cloud_url
-            uploaded += 1
-
-            if (uploaded % 50) == 0:
-                print(f"  Uploaded {uploaded} thumbnails...")
-
-        except Exception as e:
-            print(f"  ERROR uploading {thumbnail}: {e}", file=sys.stderr)
-            errors += 1
+        pending.append((entry, thumbnail, local_path, storage_path))
+
+    # Uploads are independent HTTPS requests; run them concurrently and
+    # update the manifest entries here as each one finishes
+    if pending:
+        size_connection_pool(bucket, args.workers)
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = {
+                executor.submit(upload_thumbnail, bucket, local_path, storage_path):
+                    (entry, thumbnail, storage_path)
+                for entry, thumbnail, local_path, storage_path in pending
+            }
+            try:
+                for future in as_completed(futures):
+                    entry, thumbnail, storage_path = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"  ERROR uploading {thumbnail}: {e}", file=sys.stderr)
+                        errors += 1
+                        continue
+
+                    entry["thumbnail"] = build_public_url(args.bucket, storage_path)
+                    uploaded += 1
+
+                    if (uploaded % 50) == 0:
+                        print(f"  Uploaded {uploaded} thumbnails...")
+                        # Checkpoint so an interrupted run resumes from here:
+                        # uploaded entries already carry the Firebase marker
+                        write_manifest(args.manifest, manifest, pretty=args.pretty)
+            except BaseException:
+                # Drop the queued uploads on Ctrl-C: their URLs could no
+                # longer be recorded, so the next run would redo them anyway
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
 
     # Write updated manifest
     if not args.dry_run and uploaded > 0:
-        with open(args.manifest, "w") as f:
-            json.dump(manifest, f, indent=2)
+        write_manifest(args.manifest, manifest, pretty=args.pretty)
         print(f"\nManifest updated: {args.manifest}")
 
     print(f"\nSummary: {uploaded} uploaded, {skipped} skipped, {errors} errors")